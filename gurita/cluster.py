@@ -10,14 +10,31 @@ Portability : POSIX
 import sys
 import logging
 import pandas as pd
-import sklearn.cluster as skcluster
-from sklearn.mixture import GaussianMixture
 import numpy as np
 import argparse
 import gurita.constants as const
 from gurita.command_base import CommandBase
 import gurita.utils as utils
 
+# The numeric columns of a data frame as a contiguous float64 array, which is the
+# layout scikit-learn works in, so that it does not make another copy. Rows with missing
+# values in any column are dropped. Returns the array and a mask of the kept rows.
+def numeric_rows(df):
+    numeric_df = df.select_dtypes(include=np.number)
+    data = np.ascontiguousarray(numeric_df.to_numpy(dtype=np.float64, na_value=np.nan))
+    complete = ~np.isnan(data).any(axis=1)
+    if complete.all():
+        return data, complete
+    return data[complete], complete
+
+# A categorical column of cluster labels for every row, built positionally from the labels
+# of the kept rows. Rows which were not clustered are missing.
+def cluster_column(labels, complete):
+    categories, codes = np.unique(labels, return_inverse=True)
+    all_codes = np.full(len(complete), -1, dtype=codes.dtype)
+    all_codes[complete] = codes
+    return pd.Categorical.from_codes(all_codes, categories=categories)
+
 class KMeans(CommandBase, name="kmeans"):
     description = "k-means clustering"
     category = "transformation"
@@ -36,6 +53,9 @@ class KMeans(CommandBase, name="kmeans"):
 
     
     def run(self, df):
+        # scikit-learn is slow to import, so it is only imported when a clustering command is run
+        import sklearn.cluster as skcluster
+        from sklearn.preprocessing import StandardScaler
         options = self.options
         selected_df = df
 
@@ -43,15 +63,26 @@ class KMeans(CommandBase, name="kmeans"):
             utils.validate_columns_error(df, options.columns)
             selected_df = df[options.columns]
 
-        # select only numeric columns for the cluster 
-        selected_df = selected_df.select_dtypes(include=np.number)
-
-        # drop rows with missing values in any column
-        selected_df = selected_df.dropna()
+        # select only numeric columns for the cluster, dropping rows with missing values in any column
+        data, complete = numeric_rows(selected_df)
+        # Standardize columns by removing the mean and scaling to unit variance, so that
+        # columns with large values do not dominate the distances. The array is scaled in
+        # place unless it is a view of the data frame. Scaling is done in double precision,
+        # because columns with a large offset, such as timestamps or genomic positions,
+        # lose their variation in single precision.
+        data = StandardScaler(copy=not data.flags.owndata).fit_transform(data)
+        # Single precision is enough for the standardized data, and halves the memory traffic
+        # of the distance computations, which scikit-learn does in the precision of its input
+        data = data.astype(np.float32)
         # Cluster the standardized data
-        kmeans = skcluster.KMeans(n_clusters=options.nclusters)
-        kmeans_transform = kmeans.fit_predict(selected_df)
-        df[self.options.name] = pd.Series(kmeans_transform, index=selected_df.index).reindex(df.index).astype('category')
+        if len(data) > const.KMEANS_MINIBATCH_MIN_ROWS:
+            # update the centroids from random batches of rows, rather than every row in each iteration
+            kmeans = skcluster.MiniBatchKMeans(n_clusters=options.nclusters,
+                batch_size=const.KMEANS_MINIBATCH_BATCH_SIZE, n_init=const.KMEANS_MINIBATCH_N_INIT)
+        else:
+            kmeans = skcluster.KMeans(n_clusters=options.nclusters)
+        kmeans_transform = kmeans.fit_predict(data)
+        df[self.options.name] = cluster_column(kmeans_transform, complete)
         return df
 
 
@@ -73,9 +104,13 @@ class GMM(CommandBase, name="gmm"):
         self.optional.add_argument(
             '--maxiter', type=int, required=False, default=const.DEFAULT_GMM_MAX_ITER,
             help=f'Number of expectation maximisation iterations to perform. Default: %(default)s.')
+        self.optional.add_argument(
+            '--covtype', required=False, default=const.DEFAULT_GMM_COVARIANCE_TYPE, choices=const.ALLOWED_GMM_COVARIANCE_TYPES,
+            help=f'Type of covariance parameters of each mixture component. Choices: %(choices)s. Default: %(default)s.')
 
     
     def run(self, df):
+        from sklearn.mixture import GaussianMixture
         options = self.options
         selected_df = df
 
@@ -83,14 +118,13 @@ class GMM(CommandBase, name="gmm"):
             utils.validate_columns_error(df, options.columns)
             selected_df = df[options.columns]
 
-        # select only numeric columns for the cluster 
-        selected_df = selected_df.select_dtypes(include=np.number)
-
-        # drop rows with missing values in any column
-        selected_df = selected_df.dropna()
+        # select only numeric columns for the cluster, dropping rows with missing values in any column
+        data, complete = numeric_rows(selected_df)
 
-        gmm = GaussianMixture(n_components=options.nclusters, max_iter=options.maxiter)
-        gmm_transform = gmm.fit_predict(selected_df)
+        # initialise the components from k-means++ seeds, instead of running k-means to convergence
+        gmm = GaussianMixture(n_components=options.nclusters, max_iter=options.maxiter,
+            covariance_type=options.covtype, init_params='k-means++')
+        gmm_transform = gmm.fit_predict(data)
 
-        df[self.options.name] = pd.Series(gmm_transform, index=selected_df.index).reindex(df.index).astype('category')
+        df[self.options.name] = cluster_column(gmm_transform, complete)
         return df
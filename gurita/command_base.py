@@ -10,8 +10,17 @@ Portability : POSIX
 import gurita.constants as const
 import argparse 
 
+def _hashable(value):
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
 class CommandBase:
     command_map = {}
+    # Commands which may modify or replace the data frame must leave this as True,
+    # so that results cached for the data frame by other commands are discarded
+    # after they run. Commands which only read the data frame can set it to False.
+    mutates_df = True
 
     def __init_subclass__(cls, name, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -20,6 +29,7 @@ class CommandBase:
 
     def __init__(self, parser_parents=[]):
         self.options = None
+        self._options_key = None
         self.parser = argparse.ArgumentParser(prog=f'{const.PROGRAM_NAME} {self.name}', description=self.description, add_help=False, parents=parser_parents)
         self.required = self.parser.add_argument_group('required arguments')
         self.optional = self.parser.add_argument_group('optional arguments')
@@ -27,3 +37,14 @@ class CommandBase:
 
     def parse_args(self, args=[]):
         self.options = self.parser.parse_args(args)
+        self._options_key = None
+
+    def options_key(self):
+        '''Return a hashable key of the options of this command, for memoising its results.
+
+        The key is a sorted tuple of (name, value) pairs, computed once from the
+        options as they were first seen.
+        '''
+        if self._options_key is None:
+            self._options_key = tuple(sorted((name, _hashable(value)) for name, value in vars(self.options).items()))
+        return self._options_key
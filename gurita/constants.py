@@ -8,7 +8,7 @@ Portability : POSIX
 '''
 
 import pkg_resources
-import matplotlib.pyplot as plt
+import matplotlib
 import numpy as np
 import pandas
 
@@ -30,8 +30,13 @@ DEFAULT_ZSCORE_SUFFIX= 'zscore'
 DEFAULT_CLUSTER_COLUMN_NAME = 'cluster'
 DEFAULT_PCA_N_COMPONENTS = 2 
 DEFAULT_KMEANS_N_CLUSTERS = 2
+# Inputs with more rows than this are clustered with mini-batch k-means
+KMEANS_MINIBATCH_MIN_ROWS = 10000
+KMEANS_MINIBATCH_BATCH_SIZE = 4096
+KMEANS_MINIBATCH_N_INIT = 3
 DEFAULT_GMM_N_CLUSTERS = 2
 DEFAULT_GMM_MAX_ITER = 100
+DEFAULT_GMM_COVARIANCE_TYPE = 'diag'
 DEFAULT_PLOT_WIDTH = 20 
 DEFAULT_PLOT_HEIGHT = 20 
 DEFAULT_PAIR_PLOT_WIDTH = 5 
@@ -41,7 +46,7 @@ DEFAULT_ORIENTATION = "v"
 DEFAULT_STYLE = "darkgrid"
 DEFAULT_CONTEXT = "notebook"
 DEFAULT_CORR_METHOD = "pearson"
-DEFAULT_PLOT_FORMAT = plt.rcParams["savefig.format"] 
+DEFAULT_PLOT_FORMAT = matplotlib.rcParams["savefig.format"] 
 DEFAULT_DENDRO_RATIO = 0.1
 DEFAULT_ISNORM_NANPOLICY = 'propagate'
 DEFAULT_CLUSTERMAP_METHOD = 'average'
@@ -72,12 +77,18 @@ DEFAULT_CI = 95
 DEFAULT_SORT_ALGORITHM = 'quicksort'
 DEFAULT_NORMTEST_ALPHA = 0.05
 DEFAULT_NORMTEST_METHOD = 'dagostino'
+DEFAULT_HLL_PRECISION = 14
+DEFAULT_HLL_CHUNK_SIZE = 65536
+DEFAULT_APPROX_SAMPLE_SIZE = 10000
+# Text columns with fewer unique values than this fraction of their length are plotted as categorical columns
+PLOT_CATEGORICAL_MAX_UNIQUE_FRACTION = 0.5
 
 #ALLOWED_FILETYPES = ['csv', 'tsv', 'CSV', 'TSV']
 ALLOWED_PLOT_FORMATS = ['png', 'jpg', 'pdf', 'svg']
 ALLOWED_STYLES = ['darkgrid', 'whitegrid', 'dark', 'white', 'ticks']
 ALLOWED_CONTEXTS = ['paper', 'notebook', 'talk', 'poster'] 
 ALLOWED_ORIENTATIONS = ['v', 'h']
+ALLOWED_GMM_COVARIANCE_TYPES = ['full', 'tied', 'diag', 'spherical']
 ALLOWED_CLUSTERMAP_METHODS = ['single', 'complete', 'average', 'weighted', 'centroid', 'median', 'ward'] 
 ALLOWED_CLUSTERMAP_METRICS = ['braycurtis', 'canberra', 'chebyshev', 'cityblock', 'correlation', 'cosine', 'dice', 'euclidean', 'hamming', 'jaccard', 'jensenshannon', 'kulsinski', 'mahalanobis', 'matching', 'minkowski', 'rogerstanimoto', 'russellrao', 'seuclidean', 'sokalmichener', 'sokalsneath', 'sqeuclidean', 'yule'] 
 ALLOWED_CORR_METHODS = ['pearson', 'kendall', 'spearman']
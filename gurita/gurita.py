@@ -118,6 +118,8 @@ def main_args(cmdline_args):
                 df = command.run(df)
             except (ValueError, TypeError) as e:
                 utils.exit_with_error(f"Error: {str(e)}", const.EXIT_COMMAND_LINE_ERROR)
+            if command.mutates_df:
+                gurita.info.clear_cache()
             if df is None:
                 break
         logging.info("Completed")
@@ -8,37 +8,229 @@ Portability : POSIX
 '''
 
 import argparse
+import sys
+import os
+import math
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, lru_cache
+import numpy as np
 import pandas as pd
 from gurita.command_base import CommandBase
 import gurita.utils as utils
-import gurita.constants as const 
+import gurita.constants as const
+import gurita.sketch as sketch
+
+# Row labels used by pandas for the summary of a numerical column
+NUMERIC_DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+QUARTILES = [0.25, 0.5, 0.75]
+
+# Compute the minimum, quartiles and maximum of a non-empty array without missing values.
+# Partitioning is O(n), compared to the O(n log n) full sort used by pandas for quantiles.
+# Quartiles use linear interpolation between the neighbouring order statistics,
+# which is the default behaviour of pandas and NumPy.
+# The array is partitioned in place, so its elements are reordered.
+def _order_statistics(values):
+    last = len(values) - 1
+    positions = [q * last for q in QUARTILES]
+    lower = [math.floor(pos) for pos in positions]
+    upper = [math.ceil(pos) for pos in positions]
+    values.partition(sorted(set([0, last] + lower + upper)))
+    partitioned = values
+    quartiles = []
+    for pos, low, high in zip(positions, lower, upper):
+        a, b = partitioned[low], partitioned[high]
+        fraction = pos - low
+        # same formulation as NumPy, for numerical stability
+        if fraction >= 0.5:
+            quartiles.append(b - (b - a) * (1 - fraction))
+        else:
+            quartiles.append(a + (b - a) * fraction)
+    return partitioned[0], quartiles, partitioned[last]
+
+# pyarrow is optional, and slow to import, so it is only looked for when a column of
+# strings is first summarised. Without it pandas stores strings as an array of Python
+# objects, which is no faster to summarise than the original column.
+@lru_cache(maxsize=None)
+def _arrow_string_dtype():
+    try:
+        return pd.StringDtype('pyarrow')
+    except ImportError:
+        return None
+
+# Object columns which hold strings are converted to the Arrow backed string dtype before
+# they are summarised, so that hashing, comparison and sorting use the typed string
+# kernels instead of chasing pointers to Python objects
+def _as_string_column(series):
+    if series.dtype == object and _arrow_string_dtype() is not None and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+        return series.astype(_arrow_string_dtype())
+    return series
+
+# Row labels used by pandas for the summary of a categorical column
+CATEGORICAL_DESCRIBE_INDEX = ['count', 'unique', 'top', 'freq']
+
+def _is_categorical_summary(series):
+    return (series.dtype == object or series.dtype.kind == 'b' or
+            isinstance(series.dtype, (pd.CategoricalDtype, pd.StringDtype)))
+
+# Summarise a categorical column in bounded memory: the number of unique values is
+# estimated with HyperLogLog, and the top value is estimated from a sample
+def _approx_describe_categorical(series):
+    count = int(series.count())
+    unique = sketch.approx_nunique(series)
+    top, freq = sketch.approx_top(series)
+    return pd.Series([count, unique, top, freq], index=CATEGORICAL_DESCRIBE_INDEX, dtype=object, name=series.name)
+
+def _describe_column(series, approx=False):
+    if approx and _is_categorical_summary(series):
+        return _approx_describe_categorical(series)
+    # Numerical columns are summarised directly with NumPy, which releases the GIL,
+    # so that columns can be processed in parallel. Everything else (categorical,
+    # boolean, datetime, extension types such as nullable integers) is handled by pandas.
+    if not isinstance(series.dtype, np.dtype) or series.dtype.kind not in 'iuf':
+        return _as_string_column(series).describe()
+    if series.dtype.kind == 'f':
+        # dropping the missing values also makes a private copy of the column
+        values = series.to_numpy()
+        values = values[~np.isnan(values)].astype(np.float64, copy=False)
+    else:
+        # NumPy integers have no missing values, and the conversion makes a private copy
+        values = series.to_numpy().astype(np.float64)
+    count = len(values)
+    stats = [float(count)] + [np.nan] * (len(NUMERIC_DESCRIBE_INDEX) - 1)
+    if count > 0:
+        # count, minimum and maximum need no extra passes over the data: the count is
+        # the length of the array and the extremes fall out of the partitioning below.
+        # The sum of squared deviations is a single dot product, without materialising
+        # the squares, and the partition reuses the private copy of the column.
+        mean = values.sum() / count
+        std = np.nan
+        if count > 1:
+            deviations = values - mean
+            std = np.sqrt(np.dot(deviations, deviations) / (count - 1))
+        minimum, quartiles, maximum = _order_statistics(values)
+        stats = [float(count), mean, std, minimum] + quartiles + [maximum]
+    return pd.Series(stats, index=NUMERIC_DESCRIBE_INDEX, name=series.name)
+
+# Select columns from a data frame, using a positional slice when the columns are
+# contiguous and in order, which avoids copying them into a new data frame
+def _select_columns(df, columns):
+    positions = [df.columns.get_loc(column) for column in columns]
+    if all(isinstance(pos, int) for pos in positions) and positions == list(range(positions[0], positions[-1] + 1)):
+        return df.iloc[:, positions[0]:positions[-1] + 1]
+    return df[columns]
+
+def _is_homogeneous_numeric(df):
+    dtypes = df.dtypes.unique()
+    return len(dtypes) == 1 and isinstance(dtypes[0], np.dtype) and dtypes[0].kind in 'iuf'
+
+# Summarise a data frame whose columns all have the same numerical type. The data is
+# a single two dimensional block, so each statistic is one vectorised NumPy reduction
+# over all of the columns at once
+def _describe_homogeneous_numeric(df):
+    values = df.to_numpy(dtype=np.float64)
+    with warnings.catch_warnings():
+        # columns which are empty, or have a single value, are reported as NaN, like pandas
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        stats = np.vstack([
+            np.count_nonzero(~np.isnan(values), axis=0).astype(np.float64),
+            np.nanmean(values, axis=0),
+            np.nanstd(values, axis=0, ddof=1),
+            np.nanmin(values, axis=0),
+            np.nanpercentile(values, [q * 100 for q in QUARTILES], axis=0),
+            np.nanmax(values, axis=0)])
+    return pd.DataFrame(stats, index=NUMERIC_DESCRIBE_INDEX, columns=df.columns.copy())
+
+def _describe_chunk(chunk, approx=False):
+    return [_describe_column(series, approx) for _name, series in chunk.items()]
+
+# Equivalent to df.describe(include='all') but the columns are summarised in
+# parallel, in chunks, using a pool of threads. If approx is True the summaries
+# of categorical columns are estimated.
+def _parallel_describe(df, columns, approx=False):
+    if columns:
+        df = _select_columns(df, columns)
+    num_columns = len(df.columns)
+    if num_columns == 0:
+        # let pandas report the error for an empty data frame
+        return df.describe(include='all')
+    # NumPy cannot take the minimum or maximum of an empty block, so frames without rows take the general path
+    if _is_homogeneous_numeric(df) and len(df) > 0:
+        return _describe_homogeneous_numeric(df)
+    num_workers = min(os.cpu_count() or 1, num_columns)
+    columns_per_chunk = math.ceil(num_columns / num_workers)
+    chunks = [df.iloc[:, start:start + columns_per_chunk] for start in range(0, num_columns, columns_per_chunk)]
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        column_summaries = [summary for chunk_summaries in executor.map(partial(_describe_chunk, approx=approx), chunks)
+                                    for summary in chunk_summaries]
+    # order the rows in the same way as pandas: the labels of the shortest summaries come first
+    row_labels = []
+    for summary_index in sorted((summary.index for summary in column_summaries), key=len):
+        for label in summary_index:
+            if label not in row_labels:
+                row_labels.append(label)
+    result = pd.concat([summary.reindex(row_labels) for summary in column_summaries], axis=1, sort=False)
+    result.columns = df.columns.copy()
+    return result
+
+
+# Rendered results of summary commands, keyed on the identity, selected columns and
+# column types of the data frame they were computed from. Repeated summaries of the
+# same data frame in a command chain are then computed only once. The cache is
+# cleared whenever a command that may modify the data frame is run.
+_result_cache = {}
+
+def clear_cache():
+    _result_cache.clear()
+
+def _cache_key(command_name, df, columns, *extra):
+    return (command_name, id(df), tuple(columns), hash(tuple(df.dtypes))) + extra
+
+# A text stream which writes to stdout and keeps a reference to each piece of text
+# written, so that the output can be written again without rendering it twice
+class _RecordingStdout:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+        return sys.stdout.write(text)
+
 
 class Describe(CommandBase, name="describe"):
     description = "Show summary information about the input data set."
     category = "summary information"
+    mutates_df = False
     
     def __init__(self):
         super().__init__()
         self.optional.add_argument(
             '-c', '--columns', metavar='COLUMN', nargs="*", type=str, required=False,
             help=f'Select only these columns')
+        self.optional.add_argument(
+            '--approx', action='store_true', default=False, required=False,
+            help=f'Estimate the number of unique values and the most frequent value of categorical columns. Faster and uses less memory on large data sets.')
 
 
     def run(self, df):
         options = self.options
-        rows, cols = df.shape
-        pd.set_option('display.max_columns', None)
         if options.columns:
             utils.validate_columns_error(df, options.columns)
-            print(df[options.columns].describe(include='all'))
-        else:
-            print(df.describe(include='all'))
+        key = _cache_key(self.name, df, options.columns or df.columns, options.approx)
+        if key not in _result_cache:
+            summary = _parallel_describe(df, options.columns, options.approx)
+            # show all the columns, without changing the display options for other commands
+            with pd.option_context('display.max_columns', None):
+                _result_cache[key] = str(summary) + '\n'
+        utils.write_stdout(_result_cache[key])
         return df
 
 
 class Pretty(CommandBase, name="pretty"):
     description = "Pretty print a fragment of the data set."
     category = "summary information"
+    mutates_df = False
     
     def __init__(self):
         super().__init__()
@@ -58,15 +250,33 @@ class Pretty(CommandBase, name="pretty"):
         selected_df = df
         if options.columns:
             utils.validate_columns_error(df, options.columns)
-        print(selected_df.to_string(columns=options.columns, header=True, max_rows=options.maxrows, max_cols=options.maxcols, show_dimensions=False, index=False))
-        nrows, ncols = df.shape
-        print(f"\n[{nrows} rows x {ncols} columns]")
+            # project onto the selected columns first so that formatting only considers those columns
+            selected_df = df[options.columns]
+        # the column formatters are built once per data frame and the rendered table is
+        # reused when the same fragment is printed again in a command chain
+        key = _cache_key(self.name, df, options.columns or df.columns, options.maxrows, options.maxcols)
+        try:
+            if key in _result_cache:
+                for text in _result_cache[key]:
+                    sys.stdout.write(text)
+            else:
+                # write the table directly to stdout, keeping the text that pandas rendered
+                # rather than building another copy of it for the cache.
+                # pandas appends the dimensions of the table as part of the same rendering
+                output = _RecordingStdout()
+                selected_df.to_string(buf=output, header=True, max_rows=options.maxrows, max_cols=options.maxcols, show_dimensions=True, index=False)
+                output.write('\n')
+                _result_cache[key] = output.parts
+            sys.stdout.flush()
+        except BrokenPipeError:
+            utils.exit_broken_pipe()
         return df
 
 
 class Unique(CommandBase, name="unique"):
     description = "Print the unique values from a column."
     category = "summary information"
+    mutates_df = False
     
     def __init__(self):
         super().__init__()
@@ -82,7 +292,30 @@ class Unique(CommandBase, name="unique"):
     def run(self, df):
         options = self.options
         utils.check_df_has_columns(df, [options.column])
-        this_unique = df[options.column].unique()
-        if options.sort:
-            this_unique.sort()
-        print("\n".join(this_unique))
+        this_unique = self.unique_values(df[options.column])
+        # encode each value once into a single buffer and write it in one call,
+        # rather than joining a large intermediate string to be printed.
+        # Missing values are written like the NA indicator of out, whichever type pandas used to store them
+        encoding = sys.stdout.encoding
+        missing = pd.isna(this_unique)
+        output = bytearray()
+        for item, is_missing in zip(this_unique, missing):
+            output += (const.DEFAULT_NA if is_missing else str(item)).encode(encoding)
+            output += b'\n'
+        utils.write_stdout(output)
+
+    def unique_values(self, column):
+        column = _as_string_column(column)
+        # pd.unique is hash based and preserves order of appearance
+        this_unique = pd.unique(column.values)
+        if self.options.sort:
+            # only the (usually small) array of unique values is sorted, using the
+            # sorter for its type; missing values are placed last
+            if isinstance(this_unique, np.ndarray) and this_unique.dtype.kind in 'iuf':
+                # vectorised NumPy quicksort directly on the typed values
+                this_unique = np.sort(this_unique, kind='quicksort')
+            else:
+                # strings are sorted by the typed string array when pyarrow is available,
+                # otherwise by comparing the Python objects
+                this_unique = pd.Series(this_unique).sort_values(na_position='last').array
+        return this_unique
@@ -72,6 +72,7 @@ class In(CommandBase, name="in"):
 class Out(CommandBase, name="out"):
     description = "Write the dataset to a file or standard output in CSV/TSV format"
     category = "input/output"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.file_sep, io_args.na]
@@ -94,16 +95,22 @@ class Out(CommandBase, name="out"):
             maybe_sep = utils.get_sep_from_extension(options.out)
             if maybe_sep is not None:
                 kwargs['sep'] = maybe_sep
-            output_file = options.out
-            output_file_description = options.out
-        else:
-            output_file = sys.stdout
         if options.sep is not None:
             # If the user specifies a separator to use it overrides anything else, including whatever may
             # be inferred from the name of the file
             kwargs['sep'] = utils.decode_escapes(options.sep)
-        try:
-            df.to_csv(output_file, **kwargs)
-        except IOError:
-            utils.exit_with_error(f"Could not open or write to file: {output_file_description}", const.EXIT_FILE_IO_ERROR)
+        if options.out is None:
+            # Write encoded rows directly to the binary buffer underneath stdout, bypassing the text layer
+            try:
+                # flush anything already written in text mode so that output stays in order
+                sys.stdout.flush()
+                df.to_csv(sys.stdout.buffer, encoding=sys.stdout.encoding, lineterminator='\n', **kwargs)
+                sys.stdout.buffer.flush()
+            except BrokenPipeError:
+                utils.exit_broken_pipe()
+        else:
+            try:
+                df.to_csv(options.out, **kwargs)
+            except IOError:
+                utils.exit_with_error(f"Could not open or write to file: {options.out}", const.EXIT_FILE_IO_ERROR)
         return df
@@ -10,9 +10,6 @@ Portability : POSIX
 import sys
 import logging
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
-import sklearn.decomposition as sk_decomp 
-from sklearn.impute import SimpleImputer
 import numpy as np
 import argparse
 import gurita.constants as const
@@ -37,6 +34,9 @@ class PCA(CommandBase, name="pca"):
 
     
     def run(self, df):
+        # scikit-learn is slow to import, so it is only imported when the command is run
+        from sklearn.preprocessing import StandardScaler
+        import sklearn.decomposition as sk_decomp
         options = self.options
         selected_df = df
 
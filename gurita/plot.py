@@ -10,19 +10,65 @@ Portability : POSIX
 import sys
 import argparse
 import logging
-import seaborn as sns
-import matplotlib.pyplot as plt
+import hashlib
+import warnings
+import numpy as np
+import pandas as pd
 from gurita.command_base import CommandBase
 import gurita.render_plot as render_plot
+import gurita.plot_cache as plot_cache
 import gurita.io_arguments as io_args 
-from gurita.plot_arguments import make_plot_arguments, x_argument, y_argument, hue, row, col, order, hue_order, orient, logx, logy, xlim, ylim, dotsize, dotsizerange, dotalpha, dotlinewidth, dotlinecolour, dotstyle, colwrap, dodge, vlines, hlines, strip, nooutliers, estimator
+from gurita.plot_arguments import make_plot_arguments, x_argument, y_argument, hue, row, col, order, hue_order, orient, logx, logy, xlim, ylim, dotsize, dotsizerange, dotalpha, dotlinewidth, dotlinecolour, dotstyle, colwrap, dodge, maxpoints, aggregate, vlines, hlines, strip, nooutliers, estimator
 import gurita.constants as const
 import gurita.utils as utils
 
 
+# shrink_for_plot makes grouping columns categorical, and pandas 2.1 and later warn when
+# seaborn 0.12 groups categorical data without passing observed. The behaviour is
+# unchanged, so the warning is ignored, but only when it comes from seaborn.
+warnings.filterwarnings('ignore', message='The default of observed=False is deprecated',
+                        category=FutureWarning, module='seaborn')
+
+# A random sample of at most max_points rows of a data frame, in their original order.
+# The sample is fixed so that plots are reproducible.
+def sample_rows(df, max_points):
+    if max_points is not None and max_points < 1:
+        utils.exit_with_error(f"The maximum number of points must be at least 1: {max_points}", const.EXIT_COMMAND_LINE_ERROR)
+    if max_points is None or len(df) <= max_points:
+        return df
+    positions = np.random.default_rng(0).choice(len(df), size=max_points, replace=False)
+    return df.iloc[np.sort(positions)]
+
+# Draw vertical lines at the X axis locations vlines, and horizontal lines at the
+# Y axis locations hlines, on every axis of a plot. Each axis gets one collection of
+# lines, spanning its full height or width like axvline and axhline.
+def draw_lines(graph, vlines, hlines):
+    if vlines is None and hlines is None:
+        return
+    for ax in graph.axes.ravel():
+        if vlines is not None:
+            ax.vlines(vlines, 0, 1, transform=ax.get_xaxis_transform())
+        if hlines is not None:
+            ax.hlines(hlines, 0, 1, transform=ax.get_yaxis_transform())
+
+# The most recently applied seaborn style and context. Setting them updates many
+# global matplotlib parameters, so it is skipped when they are unchanged, which is
+# usual in a command chain with several plots.
+_last_style = (None, None)
+
+def _apply_sns_style(style, context):
+    global _last_style
+    if (style, context) != _last_style:
+        import seaborn as sns
+        sns.set_style(style)
+        sns.set_context(context)
+        _last_style = (style, context)
+
+
 class PairPlot(CommandBase, name="pair"):
     description = "Pair plot of numerical features."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments,
@@ -44,13 +90,16 @@ class PairPlot(CommandBase, name="pair"):
         hue_order(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
         _width_inches, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         kwargs = {}
-        graph = sns.pairplot(data=df, height=height_inches, aspect=aspect,
+        plot_df = utils.shrink_for_plot(df, options.columns or list(df.columns), grouping=[options.hue])
+        graph = sns.pairplot(data=plot_df, height=height_inches, aspect=aspect,
                 vars=options.columns, kind=options.kind, hue=options.hue, hue_order=options.hueorder,
                 corner=options.corner, **kwargs)
         render_plot.render_plot(options, graph, self.name)
@@ -59,6 +108,7 @@ class PairPlot(CommandBase, name="pair"):
 class BarPlot(CommandBase, name="bar"):
     description = "Bar plot of categorical feature."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -82,10 +132,12 @@ class BarPlot(CommandBase, name="bar"):
         group.add_argument('--ci', metavar='NUM', type=float, required=False, nargs='?', const=const.DEFAULT_CI, help=f'Show confidence interval as error bar to estimate uncertainty of point estimate')
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         estimator_fun = utils.make_estimator(options.estimator)
@@ -93,7 +145,8 @@ class BarPlot(CommandBase, name="bar"):
         if options.std:
             error_indicator = 'sd' 
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.catplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.catplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, estimator=estimator_fun,
                 ci=error_indicator,
                 col=options.col, row=options.row,
@@ -107,6 +160,7 @@ class BarPlot(CommandBase, name="bar"):
 class BoxPlot(CommandBase, name="box"):
     description = "Plot distrbution of numerical column using box-and-whiskers."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -127,21 +181,24 @@ class BoxPlot(CommandBase, name="box"):
         strip(self)
         nooutliers(self)
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.catplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.catplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 order=options.order, hue_order=options.hueorder,
                 showfliers=not(options.nooutliers),
                 orient=options.orient, facet_kws=facet_kws, col_wrap=options.colwrap, **kwargs)
         if options.strip:
-            graph.map_dataframe(sns.stripplot, data=df, x=options.xaxis, y=options.yaxis, alpha=0.8, color="black", order=options.order)
+            graph.map_dataframe(sns.stripplot, x=options.xaxis, y=options.yaxis, alpha=0.8, color="black", order=options.order)
         render_plot.render_plot(options, graph, self.name)
         return df
 
@@ -149,6 +206,7 @@ class BoxPlot(CommandBase, name="box"):
 class BoxenPlot(CommandBase, name="boxen"):
     description = "Plot distrbution of numerical column using boxes for quantiles."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -170,28 +228,102 @@ class BoxenPlot(CommandBase, name="boxen"):
         nooutliers(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.catplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.catplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 order=options.order, hue_order=options.hueorder,
                 showfliers=not(options.nooutliers),
                 orient=options.orient, facet_kws=facet_kws, col_wrap=options.colwrap, **kwargs)
         if options.strip:
-            graph.map_dataframe(sns.stripplot, data=df, x=options.xaxis, y=options.yaxis, alpha=0.8, color="black")
+            graph.map_dataframe(sns.stripplot, x=options.xaxis, y=options.yaxis, alpha=0.8, color="black", order=options.order)
         render_plot.render_plot(options, graph, self.name)
         return df
 
 
+# Equivalent to df.pivot(index=index, columns=columns, values=values), but each value
+# is written directly into its cell in a dense NumPy array, using the categorical codes
+# of its row and column labels, instead of building a hierarchical index and
+# unstacking it. Missing cells are NaN, and duplicate cells are an error, as for pivot,
+# unless an aggregation function (such as 'mean') is given to combine their values.
+def pivot_grid(df, index, columns, values, aggregate=None):
+    row_labels = pd.Categorical(df[index])
+    column_labels = pd.Categorical(df[columns])
+    value_dtype = df[values].dtype
+    if (row_labels.codes < 0).any() or (column_labels.codes < 0).any() or not isinstance(value_dtype, np.dtype) or value_dtype.kind not in 'iuf':
+        # let pandas handle missing row or column labels, and values which are not NumPy numbers,
+        # whose missing cells (NaT for datetimes, NaN in an object array for booleans) differ
+        if aggregate is not None:
+            return aggregate_grid(df, index, columns, values, aggregate)
+        if df.duplicated([index, columns]).any():
+            raise duplicate_cells_error(index, columns)
+        return df.pivot(index=index, columns=columns, values=values)
+    num_rows, num_columns = len(row_labels.categories), len(column_labels.categories)
+    cells = row_labels.codes.astype(np.int64) * num_columns + column_labels.codes
+    cell_counts = np.bincount(cells, minlength=num_rows * num_columns)
+    if (cell_counts > 1).any():
+        if aggregate is not None:
+            return aggregate_grid(df, index, columns, values, aggregate)
+        raise duplicate_cells_error(index, columns)
+    cell_values = df[values].to_numpy()
+    if cell_counts.all():
+        # every cell is written below
+        grid = np.empty(num_rows * num_columns, dtype=cell_values.dtype)
+    else:
+        # missing cells are NaN, so integers must become floating point
+        dtype = cell_values.dtype if cell_values.dtype.kind == 'f' else np.dtype(np.float64)
+        grid = np.full(num_rows * num_columns, np.nan, dtype=dtype)
+    grid[cells] = cell_values
+    return pd.DataFrame(grid.reshape(num_rows, num_columns),
+                        index=pd.Index(row_labels.categories, name=index),
+                        columns=pd.Index(column_labels.categories, name=columns))
+
+def duplicate_cells_error(index, columns):
+    return ValueError(f"Some pairs of {columns} and {index} values occur more than once, use --agg to combine them")
+
+# Combine the values of duplicate cells with an aggregation function, then pivot. Only
+# the combinations of row and column labels which occur in the data are computed.
+def aggregate_grid(df, index, columns, values, aggregate):
+    grouped = df.groupby([index, columns], observed=True, dropna=False)[values]
+    return grouped.agg(aggregate).unstack(columns)
+
+# Hierarchical clustering linkages, keyed on the clustered data and the clustering
+# parameters, so that clustermaps of the same data which differ only in their
+# appearance (colour map, annotations, colour range) do not recompute the distances
+# and linkage.
+_linkage_cache = {}
+
+# Cluster the rows of a two dimensional array, in the same way as seaborn's clustermap
+def cluster_linkage(data, metric, method):
+    from scipy.cluster import hierarchy
+    array = np.ascontiguousarray(data, dtype=np.float64)
+    key = (array.shape, hashlib.blake2b(array.tobytes()).hexdigest(), metric, method)
+    if key not in _linkage_cache:
+        _linkage_cache[key] = hierarchy.linkage(array, method=method, metric=metric)
+    return _linkage_cache[key]
+
+# Positions of labels, sorted according to a list of ordered values. The positions
+# are found by sorting the categorical codes of the labels, rather than looking up each
+# label in a dictionary. Unlisted labels are placed last, in their existing order.
+def label_order(labels, order):
+    codes = pd.Categorical(labels, categories=order).codes.astype(np.int64)
+    codes[codes < 0] = len(order)
+    return np.argsort(codes, kind='stable')
+
+
 class Clustermap(CommandBase, name="clustermap"):
     description = "Clustered heatmap of two categorical columns." 
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -201,6 +333,7 @@ class Clustermap(CommandBase, name="clustermap"):
         self.required.add_argument(
             '-v', '--val', metavar='COLUMN', required=True, type=str,
             help=f'Interpret this feature (column of data) as the values of the heatmap')
+        aggregate(self)
         self.optional.add_argument(
             '--cmap',  metavar='COLOR_MAP_NAME', type=str, required=False,
             help=f'Use this color map, will use Seaborn default if not specified')
@@ -250,18 +383,16 @@ class Clustermap(CommandBase, name="clustermap"):
         self.optional.set_defaults(colclust=True)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        if options.xaxis not in df.columns:
-            utils.exit_with_error(f"{options.xaxis} is not an attribute of the data set", const.EXIT_COMMAND_LINE_ERROR)
-        if options.yaxis not in df.columns:
-            utils.exit_with_error(f"{options.yaxis} is not an attribute of the data set", const.EXIT_COMMAND_LINE_ERROR)
-        if options.val not in df.columns:
-            utils.exit_with_error(f"{options.val} is not an attribute of the data set", const.EXIT_COMMAND_LINE_ERROR)
+        utils.validate_columns_error(df, [options.xaxis, options.yaxis, options.val])
         self.x = options.xaxis
         self.y = options.yaxis
         self.val = options.val
-        pivot_data = df.pivot(index=self.y, columns=self.x, values=self.val)
+        pivot_data = pivot_grid(df, self.y, self.x, self.val, options.agg)
         width_inches, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
         figsize = (width_inches, height_inches)
         kwargs = {}
@@ -279,6 +410,16 @@ class Clustermap(CommandBase, name="clustermap"):
         yticklabels = True
         if options.nytl:
             yticklabels = False
+        # clustering uses the normalised data, as in seaborn
+        cluster_data = pivot_data
+        if 'z_score' in kwargs:
+            cluster_data = sns.matrix.ClusterGrid.z_score(cluster_data, kwargs['z_score'])
+        if 'standard_scale' in kwargs:
+            cluster_data = sns.matrix.ClusterGrid.standard_scale(cluster_data, kwargs['standard_scale'])
+        if options.rowclust:
+            kwargs['row_linkage'] = cluster_linkage(cluster_data.to_numpy(), options.metric, options.method)
+        if options.colclust:
+            kwargs['col_linkage'] = cluster_linkage(cluster_data.to_numpy().T, options.metric, options.method)
         # the following arguments control heatmap aspects of the clustermap
         kwargs['annot'] = self.options.annot
         kwargs['fmt'] = self.options.fmt
@@ -297,6 +438,7 @@ class Clustermap(CommandBase, name="clustermap"):
 class Heatmap(CommandBase, name="heatmap"):
     description = "Heatmap of two categorical columns." 
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -310,6 +452,7 @@ class Heatmap(CommandBase, name="heatmap"):
         self.required.add_argument(
             '-v', '--val', metavar='COLUMN', required=True, type=str,
             help=f'Interpret this feature (column of data) as the values of the heatmap')
+        aggregate(self)
         self.optional.add_argument(
             '--cmap',  metavar='COLOR_MAP_NAME', type=str, required=False,
             help=f'Use this color map, will use Seaborn default if not specified')
@@ -351,14 +494,12 @@ class Heatmap(CommandBase, name="heatmap"):
             help=f'Order the Y axis according to a given list of values, top to bottom. Unlisted values will appear in arbitrary order.')
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        if options.xaxis not in df.columns:
-            utils.exit_with_error(f"{options.xaxis} is not an attribute of the data set", const.EXIT_COMMAND_LINE_ERROR)
-        if options.yaxis not in df.columns:
-            utils.exit_with_error(f"{options.yaxis} is not an attribute of the data set", const.EXIT_COMMAND_LINE_ERROR)
-        if options.val not in df.columns:
-            utils.exit_with_error(f"{options.val} is not an attribute of the data set", const.EXIT_COMMAND_LINE_ERROR)
+        utils.validate_columns_error(df, [options.xaxis, options.yaxis, options.val])
         self.x = options.xaxis
         self.y = options.yaxis
         self.val = options.val
@@ -366,7 +507,7 @@ class Heatmap(CommandBase, name="heatmap"):
         if options.annot is not None:
             kwargs['fmt'] = options.annot
             kwargs['annot'] = True
-        pivot_data = df.pivot(index=self.y, columns=self.x, values=self.val)
+        pivot_data = pivot_grid(df, self.y, self.x, self.val, options.agg)
         if self.options.sortx is not None:
             ascending = True if self.options.sortx == 'a' else False
             pivot_data.sort_index(axis=1, ascending=ascending, inplace=True)
@@ -375,28 +516,26 @@ class Heatmap(CommandBase, name="heatmap"):
             pivot_data.sort_index(axis=0, ascending=ascending, inplace=True)
         if self.options.orderx is not None:
             # orderx must not have duplicates
-            if len(self.options.orderx) != len(set(self.options.orderx)):
+            orderx = pd.Index(self.options.orderx)
+            if not orderx.is_unique:
                 utils.exit_with_error("X axis labels for ordering contains duplicates", const.EXIT_COMMAND_LINE_ERROR)
             # orderx must be a subset of the column labels
-            column_label_strings = pivot_data.columns.map(str)
-            if not set(self.options.orderx).issubset(set(column_label_strings)):
+            column_label_strings = pivot_data.columns.astype(str)
+            if not orderx.isin(column_label_strings).all():
                 utils.exit_with_error("X axis labels for ordering are not a subset of column labels", const.EXIT_COMMAND_LINE_ERROR)
-            order_map = { item: pos for (pos, item) in enumerate(self.options.orderx) }
-            max_index = len(self.options.orderx)
-            pivot_data.sort_index(axis=1, inplace=True, key=lambda index: index.map(lambda label: order_map.get(str(label), max_index)))
+            pivot_data = pivot_data.iloc[:, label_order(column_label_strings, orderx)]
         if self.options.ordery is not None:
             # ordery must not have duplicates
-            if len(self.options.ordery) != len(set(self.options.ordery)):
+            ordery = pd.Index(self.options.ordery)
+            if not ordery.is_unique:
                 utils.exit_with_error("Y axis labels for ordering contains duplicates", const.EXIT_COMMAND_LINE_ERROR)
             # ordery must be a subset of the row labels
-            row_label_strings = pivot_data.index.map(str)
-            if not set(self.options.ordery).issubset(set(row_label_strings)):
+            row_label_strings = pivot_data.index.astype(str)
+            if not ordery.isin(row_label_strings).all():
                 utils.exit_with_error("Y axis labels for ordering are not a subset of row labels", const.EXIT_COMMAND_LINE_ERROR)
-            order_map = { item: pos for (pos, item) in enumerate(self.options.ordery) }
-            max_index = len(self.options.ordery)
-            pivot_data.sort_index(axis=0, inplace=True, key=lambda index: index.map(lambda label: order_map.get(str(label), max_index)))
+            pivot_data = pivot_data.iloc[label_order(row_label_strings, ordery), :]
         width_inches, height_inches, _aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        fig, ax = plt.subplots(figsize=(width_inches, height_inches))
+        fig, ax = render_plot.pooled_subplots((width_inches, height_inches))
         graph = sns.heatmap(data=pivot_data, cmap=self.options.cmap, robust=self.options.robust,
                     vmin=self.options.vmin, vmax=self.options.vmax, **kwargs)
         render_plot.render_plot(options, graph, self.name)
@@ -406,6 +545,7 @@ class Heatmap(CommandBase, name="heatmap"):
 class HistogramPlot(CommandBase, name="hist"):
     description = "Histogram of numerical or categorical feature."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -454,10 +594,12 @@ class HistogramPlot(CommandBase, name="hist"):
            help=f'For normalised statistics (e.g. percent), normalise each histogram in the plot independently, otherwise normalise over the full dataset')
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
@@ -483,7 +625,8 @@ class HistogramPlot(CommandBase, name="hist"):
             # element and fill are only defined for univariate data
             kwargs.pop('element', None)
             kwargs.pop('fill', None)
-        graph = sns.displot(kind='hist', data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.displot(kind='hist', data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 cumulative=options.cumulative,
@@ -491,14 +634,7 @@ class HistogramPlot(CommandBase, name="hist"):
                 stat=options.stat,
                 common_norm=not(options.indnorm),
                 facet_kws=facet_kws, col_wrap=options.colwrap, **kwargs)
-        if options.vlines is not None:
-            for ax in graph.axes.ravel():
-                for pos in options.vlines:
-                    ax.axvline(pos)
-        if options.hlines is not None:
-            for ax in graph.axes.ravel():
-                for pos in options.hlines:
-                    ax.axhline(pos)
+        draw_lines(graph, options.vlines, options.hlines)
         render_plot.render_plot(options, graph, self.name)
         return df
 
@@ -506,6 +642,7 @@ class HistogramPlot(CommandBase, name="hist"):
 class LinePlot(CommandBase, name="line"):
     description = "Line plot of numerical feature."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -523,29 +660,27 @@ class LinePlot(CommandBase, name="line"):
         xlim(self)
         ylim(self)
         colwrap(self)
+        maxpoints(self)
         vlines(self)
         hlines(self)
     
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.relplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        plot_df = sample_rows(plot_df, options.maxpoints)
+        graph = sns.relplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 hue_order=options.hueorder, facet_kws=facet_kws, col_wrap=options.colwrap, **kwargs)
-        if options.vlines is not None:
-            for ax in graph.axes.ravel():
-                for pos in options.vlines:
-                    ax.axvline(pos)
-        if options.hlines is not None:
-            for ax in graph.axes.ravel():
-                for pos in options.hlines:
-                    ax.axhline(pos)
+        draw_lines(graph, options.vlines, options.hlines)
         render_plot.render_plot(options, graph, self.name)
         return df
 
@@ -553,6 +688,7 @@ class LinePlot(CommandBase, name="line"):
 class PointPlot(CommandBase, name="point"):
     description = "Point plot of numerical feature."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -572,14 +708,17 @@ class PointPlot(CommandBase, name="point"):
         colwrap(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.catplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.catplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 order=options.order, hue_order=options.hueorder,
@@ -591,6 +730,7 @@ class PointPlot(CommandBase, name="point"):
 class ScatterPlot(CommandBase, name="scatter"):
     description = "Scatter plot comparing two features as dot plot"
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -613,14 +753,17 @@ class ScatterPlot(CommandBase, name="scatter"):
         dotstyle(self)
         dotsizerange(self)
         dotlinecolour(self)
+        maxpoints(self)
         vlines(self)
         hlines(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
         facet_kws = { 'legend_out': True }
         kwargs = {}
@@ -631,19 +774,18 @@ class ScatterPlot(CommandBase, name="scatter"):
         sizes = None
         if options.dotsizerange is not None:
             sizes=tuple(options.dotsizerange)
-        graph = sns.relplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis, options.dotsize], grouping=[options.hue, options.row, options.col, options.dotstyle])
+        sampled_df = sample_rows(plot_df, options.maxpoints)
+        if sampled_df is not plot_df:
+            # store the dots of a sampled (large) plot as an image in vector formats, instead of one path per dot
+            kwargs['rasterized'] = True
+            plot_df = sampled_df
+        graph = sns.relplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 style=options.dotstyle, sizes=sizes, size=options.dotsize, alpha=options.dotalpha,
                 hue_order=options.hueorder, facet_kws=facet_kws, col_wrap=options.colwrap, **kwargs)
-        if options.vlines is not None:
-            for ax in graph.axes.ravel():
-                for pos in options.vlines:
-                    ax.axvline(pos)
-        if options.hlines is not None:
-            for ax in graph.axes.ravel():
-                for pos in options.hlines:
-                    ax.axhline(pos)
+        draw_lines(graph, options.vlines, options.hlines)
         render_plot.render_plot(options, graph, self.name)
         return df
 
@@ -651,6 +793,7 @@ class ScatterPlot(CommandBase, name="scatter"):
 class LMPlot(CommandBase, name="lmplot"):
     description = "Regression plot"
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -664,15 +807,18 @@ class LMPlot(CommandBase, name="lmplot"):
         colwrap(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
         facet_kws = { 'legend_out': True }
         kwargs = {}
         scatter_kws = {}
-        graph = sns.lmplot(data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.lmplot(data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 hue_order=options.hueorder, scatter_kws=scatter_kws, facet_kws=facet_kws, col_wrap=options.colwrap, **kwargs)
@@ -683,6 +829,7 @@ class LMPlot(CommandBase, name="lmplot"):
 class StripPlot(CommandBase, name="strip"):
     description = "Plot distrbution of numerical column using dotted strip."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -703,14 +850,17 @@ class StripPlot(CommandBase, name="strip"):
         colwrap(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.catplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.catplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 order=options.order, hue_order=options.hueorder,
@@ -723,6 +873,7 @@ class StripPlot(CommandBase, name="strip"):
 class SwarmPlot(CommandBase, name="swarm"):
     description = "Plot distrbution of numerical column using dot swarm."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -743,14 +894,17 @@ class SwarmPlot(CommandBase, name="swarm"):
         colwrap(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.catplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.catplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 order=options.order, hue_order=options.hueorder, dodge=options.dodge,
@@ -762,6 +916,7 @@ class SwarmPlot(CommandBase, name="swarm"):
 class ViolinPlot(CommandBase, name="violin"):
     description = "Plot distrbution of numerical column using violin."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -782,20 +937,23 @@ class ViolinPlot(CommandBase, name="violin"):
         strip(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.catplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.catplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 order=options.order, hue_order=options.hueorder,
                 orient=options.orient, facet_kws=facet_kws, col_wrap=options.colwrap, **kwargs)
         if options.strip:
-            graph.map_dataframe(sns.stripplot, data=df, x=options.xaxis, y=options.yaxis, alpha=0.8, color="black", order=options.order)
+            graph.map_dataframe(sns.stripplot, x=options.xaxis, y=options.yaxis, alpha=0.8, color="black", order=options.order)
         render_plot.render_plot(options, graph, self.name) 
         return df
 
@@ -803,6 +961,7 @@ class ViolinPlot(CommandBase, name="violin"):
 class CountPlot(CommandBase, name="count"):
     description = "Plot count of categorical columns using bars."
     category = "plotting"
+    mutates_df = False
 
     def __init__(self):
         parents = [io_args.io_arguments, make_plot_arguments()]
@@ -822,18 +981,21 @@ class CountPlot(CommandBase, name="count"):
         colwrap(self)
 
 
+    @plot_cache.cached_plot
     def run(self, df):
+        render_plot.select_backend(self.options.show)
+        import seaborn as sns
         options = self.options
         if options.xaxis is not None and options.yaxis is not None:
             utils.exit_with_error("You cannot use both -x (--xaxis) and -y (--yaxis) at the same time in a count plot", const.EXIT_COMMAND_LINE_ERROR)
         if options.xaxis is None and options.yaxis is None:
             utils.exit_with_error("A count plot requires either -x (--xaxis) OR -y (--yaxis) to be specified", const.EXIT_COMMAND_LINE_ERROR)
-        sns.set_style(options.plotstyle)
-        sns.set_context(options.context)
+        _apply_sns_style(options.plotstyle, options.context)
         facet_kws = { 'legend_out': True }
         kwargs = {}
         _width, height_inches, aspect = utils.plot_dimensions_inches(options.width, options.height) 
-        graph = sns.catplot(kind=self.name, data=df,
+        plot_df = utils.shrink_for_plot(df, [options.xaxis, options.yaxis], grouping=[options.hue, options.row, options.col])
+        graph = sns.catplot(kind=self.name, data=plot_df,
                 x=options.xaxis, y=options.yaxis, col=options.col, row=options.row,
                 height=height_inches, aspect=aspect, hue=options.hue,
                 order=options.order, hue_order=options.hueorder, 
@@ -8,8 +8,12 @@ Portability : POSIX
 '''
 
 import argparse
+import functools
 import gurita.constants as const
 
+# The parser is only used as a parent of the parsers of plotting commands, which copy its
+# arguments, so one parser for each default plot size is built and shared between commands
+@functools.lru_cache(maxsize=None)
 def make_plot_arguments(default_width=const.DEFAULT_PLOT_WIDTH, default_height=const.DEFAULT_PLOT_HEIGHT):
 
     plot_arguments = argparse.ArgumentParser(add_help=False)
@@ -23,6 +27,10 @@ def make_plot_arguments(default_width=const.DEFAULT_PLOT_WIDTH, default_height=c
         '--show', action='store_true',
         default=False,
         help=f'Show an interactive plot window instead of saving to a file.')
+    plot_arguments_group.add_argument(
+        '--cache', action='store_true',
+        default=False,
+        help=f'Reuse a previously rendered plot if the data and arguments are unchanged. Plots are cached in $XDG_CACHE_HOME/{const.PROGRAM_NAME} (default ~/.cache/{const.PROGRAM_NAME}).')
     plot_arguments_group.add_argument(
         '--nolegend', action='store_true',
         default=False,
@@ -270,6 +278,16 @@ def dodge(self, required=False):
 #    '--dodge', action='store_true', required=False,
 #    help=f'Separate hue levels along the categorical axis (when --hue is used).')
 
+def maxpoints(self, required=False):
+    target(self, required).add_argument('--maxpoints', metavar='NUM',
+        type=int, required=required,
+        help=f'Plot a random sample of at most NUM rows of the data. Useful for very large data sets, where most points would be drawn on top of each other. By default all rows are plotted.')
+
+def aggregate(self, required=False):
+    target(self, required).add_argument('--agg', metavar='FUN',
+        required=required, choices=const.ALLOWED_ESTIMATORS,
+        help=f'Combine the values of rows with the same X and Y values using this function. By default each pair of X and Y values must occur only once. Allowed values: %(choices)s.')
+
 def vlines(self, required=False):
     target(self, required).add_argument('--vlines', metavar='AXIS_LOCATION',
         type=float, nargs="+", required=required,
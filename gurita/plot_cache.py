@@ -0,0 +1,72 @@
+'''
+Module      : plot_cache
+Description : Disk cache of rendered plots, keyed on the plot arguments and the plotted data
+Copyright   : (c) Bernie Pope, 15 October 2026
+License     : MIT
+Maintainer  : bjpope@unimelb.edu.au
+Portability : POSIX
+'''
+
+import os
+import shutil
+import logging
+import hashlib
+import functools
+import tempfile
+from importlib.metadata import version
+from pathlib import Path
+import pandas as pd
+import gurita.constants as const
+import gurita.render_plot as render_plot
+
+# Options which do not change the content of the rendered plot
+UNCACHED_OPTIONS = {'out', 'show', 'cache'}
+
+def cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')
+    return Path(cache_home, const.PROGRAM_NAME)
+
+def plot_key(command_name, options_key, df):
+    '''Compute a stable key for a plot from the command name, the options that affect
+    the rendered plot, the library versions used to render it, and the contents, column
+    names and types of the data frame. The versions of matplotlib and seaborn are read
+    from their package metadata, so that they are not imported on a cache hit.
+    '''
+    options_items = [(name, value) for name, value in options_key if name not in UNCACHED_OPTIONS]
+    digest = hashlib.blake2b()
+    for field in [command_name, options_items, const.PROGRAM_VERSION, pd.__version__,
+                  version('matplotlib'), version('seaborn'), list(df.columns), list(df.dtypes), df.shape]:
+        digest.update(repr(field).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def cached_plot(run):
+    '''Decorate the run method of a plotting command so that, if --cache is given,
+    a plot previously rendered from the same data and arguments is copied to the
+    output file instead of being drawn again. Interactive plots are never cached.
+    '''
+    @functools.wraps(run)
+    def cached_run(self, df):
+        options = self.options
+        if not options.cache or options.show:
+            return run(self, df)
+        # the key must be computed before running the command, which may modify its options
+        cache_path = cache_dir() / f"{plot_key(self.name, self.options_key(), df)}.{options.format}"
+        output_filename = render_plot.make_output_filename(options, self.name)
+        if cache_path.exists():
+            # an output file which already holds the same plot is left untouched, as when rendering
+            render_plot.write_if_changed(output_filename, cache_path.read_bytes())
+            return df
+        # fix the output filename so that the rendered plot can be found afterwards
+        options.out = str(output_filename)
+        result = run(self, df)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # copy to a temporary file and rename, so that a partially written plot is never cached
+            with tempfile.NamedTemporaryFile(dir=cache_path.parent, delete=False) as temp_file:
+                shutil.copyfile(output_filename, temp_file.name)
+            os.replace(temp_file.name, cache_path)
+        except OSError as e:
+            logging.warning(f"Could not save plot to cache {cache_path}: {e}")
+        return result
+    return cached_run
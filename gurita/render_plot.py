@@ -7,13 +7,76 @@ Maintainer  : bjpope@unimelb.edu.au
 Portability : POSIX
 '''
 
+import io
 import sys
-import matplotlib.pyplot as plt
 from pathlib import Path
 import gurita.utils as utils
-import seaborn as sns
+import gurita.constants as const
+
+# The backend configured for matplotlib before it was replaced by Agg, if it was replaced
+_configured_backend = None
+
+def select_backend(show):
+    '''Select the matplotlib backend for a plot, before pyplot is imported.
+
+    Plots which are saved to a file use the non-interactive Agg backend, which
+    avoids probing for, and importing, a graphical user interface toolkit.
+    Interactive plots use the backend that matplotlib is configured to use.
+    '''
+    global _configured_backend
+    import matplotlib
+    if not show:
+        if _configured_backend is None:
+            # read the configured value without resolving it, which would load an interactive backend
+            _configured_backend = dict.__getitem__(matplotlib.rcParams, 'backend')
+        matplotlib.use('Agg')
+    elif _configured_backend is not None:
+        matplotlib.use(_configured_backend)
+        _configured_backend = None
+
+# Idle figures, keyed on their size, which are kept open after they are rendered
+# so that later plots of the same size can reuse them instead of creating a new figure
+_figure_pool = {}
+# Sizes of the figures which were created by pooled_subplots, keyed on figure number
+_pooled_figure_sizes = {}
+
+def pooled_subplots(figsize):
+    '''Equivalent to plt.subplots(figsize=figsize), but reuses an idle figure of the same size if there is one.'''
+    import matplotlib
+    import matplotlib.pyplot as plt
+    fig = _figure_pool.pop(figsize, None)
+    if fig is None or not plt.fignum_exists(fig.number):
+        fig, ax = plt.subplots(figsize=figsize)
+        _pooled_figure_sizes[fig.number] = figsize
+        return fig, ax
+    plt.figure(fig.number)
+    fig.clf()
+    # the style may have changed since the figure was created
+    fig.set_facecolor(matplotlib.rcParams['figure.facecolor'])
+    fig.set_edgecolor(matplotlib.rcParams['figure.edgecolor'])
+    return fig, fig.add_subplot()
+
+def release_figure():
+    '''Close the current figure, or return it to the pool of idle figures if it can be reused.'''
+    import matplotlib.pyplot as plt
+    fig = plt.gcf()
+    figsize = _pooled_figure_sizes.get(fig.number)
+    if figsize is not None and figsize not in _figure_pool:
+        _figure_pool[figsize] = fig
+    else:
+        _pooled_figure_sizes.pop(fig.number, None)
+        plt.close(fig)
+
+def close_idle_figures():
+    import matplotlib.pyplot as plt
+    for fig in _figure_pool.values():
+        _pooled_figure_sizes.pop(fig.number, None)
+        plt.close(fig)
+    _figure_pool.clear()
 
 def render_plot(options, graph, kind):
+    import matplotlib
+    import matplotlib.pyplot as plt
     if hasattr(options, "logx") and options.logx:
         graph.set(xscale="log")
     if hasattr(options, "logy") and options.logy: 
@@ -43,38 +106,59 @@ def render_plot(options, graph, kind):
         graph.set(yticks=[])
         graph.set(yticklabels=[])
     if options.show:
+        # idle figures are open, and would otherwise be shown as well
+        close_idle_figures()
         plt.show()
     else:
        output_filename = make_output_filename(options, kind)
        # remove date and creator fields in the image metadata because these
        # are variable and could distrupt testing expected behaviour
        kwargs = {}
+       rc_params = {}
        if options.format in ['svg']:
            image_metadata = {'Creator': None, 'Date': None}
            kwargs['metadata'] = image_metadata
+           # the ids of SVG elements are random unless they are salted with a fixed string
+           if matplotlib.rcParams['svg.hashsalt'] is None:
+               rc_params['svg.hashsalt'] = const.PROGRAM_NAME
        elif options.format in ['png']:
            image_metadata = {'Title': None, 'Author': None, 'Description': None, 'Copyright': None, 'Creation Time': None, 'Software': None, 'Disclaimer': None, 'Warning': None, 'Source': None, 'Comment': None}
            kwargs['metadata'] = image_metadata
-       plt.savefig(output_filename, bbox_inches='tight', format=options.format, **kwargs)
+       elif options.format in ['pdf']:
+           image_metadata = {'Creator': None, 'Producer': None, 'CreationDate': None}
+           kwargs['metadata'] = image_metadata
+       image = io.BytesIO()
+       with matplotlib.rc_context(rc_params):
+           plt.savefig(image, bbox_inches='tight', format=options.format, **kwargs)
+       write_if_changed(output_filename, image.getvalue())
        #if options.verbose:
        #    print(f"Plot written to {output_filename}")
 
     # write to stdout by default
     #else:
     #   plt.savefig(sys.stdout.buffer, bbox_inches='tight', format=options.format)
-    plt.close() 
+    release_figure()
+
+def write_if_changed(path, contents):
+    '''Write contents to a file, unless the file already holds exactly the same contents.
+
+    Re-running a command with an explicit --out file often renders an identical
+    plot, in which case the existing file (and its modification time) is kept.
+    '''
+    try:
+        if path.stat().st_size == len(contents) and path.read_bytes() == contents:
+            return
+    except OSError:
+        pass
+    path.write_bytes(contents)
 
 def make_output_filename(options, kind):
     if options.out is not None:
         # don't try to make this unique, just use what user specified, they may want to overwrite the old file
         return Path(options.out)
     else:
-        extension = [options.format]
-        y_str = utils.output_field(options, 'yaxis')
-        x_str = utils.output_field(options, 'xaxis')
-        hue_str = utils.output_field(options, 'hue')
-        row_str = utils.output_field(options, 'row')
-        col_str = utils.output_field(options, 'col')
-        path = Path('.'.join([kind] + x_str + y_str +
-                             hue_str + row_str + col_str + extension))
+        fields = [kind]
+        for field in ['xaxis', 'yaxis', 'hue', 'row', 'col']:
+            fields += utils.output_field(options, field)
+        path = Path(f"{'.'.join(fields)}.{options.format}")
         return utils.make_unique_numbered_filepath(path)
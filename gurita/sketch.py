@@ -0,0 +1,80 @@
+'''
+Module      : sketch
+Description : Approximate summaries of large columns of data using bounded memory
+Copyright   : (c) Bernie Pope, 15 October 2026
+License     : MIT
+Maintainer  : bjpope@unimelb.edu.au
+Portability : POSIX
+'''
+
+import numpy as np
+import pandas as pd
+import gurita.constants as const
+
+HASH_BITS = 64
+
+# Number of significant bits in each element of an array of unsigned 64 bit integers.
+# Each 32 bit half is exactly representable as a float64, whose binary exponent is
+# the bit length of the half.
+def _bit_length(values):
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+
+def approx_nunique(series, precision=const.DEFAULT_HLL_PRECISION, chunk_size=const.DEFAULT_HLL_CHUNK_SIZE):
+    '''Estimate the number of distinct non-missing values in a series using HyperLogLog.
+
+    Each value is hashed to 64 bits. The first `precision` bits of the hash select
+    a register, and the register records the maximum position of the leftmost
+    1 bit in the remaining bits. Memory use is 2**precision registers regardless
+    of the length or cardinality of the series. The relative standard error is
+    approximately 1.04 / sqrt(2**precision).
+
+    The series is hashed in chunks of at most `chunk_size` rows, so that the
+    temporary arrays are the size of one chunk rather than the whole series.
+    '''
+    num_registers = 1 << precision
+    suffix_bits = HASH_BITS - precision
+    registers = np.zeros(num_registers, dtype=np.int8)
+    for start in range(0, len(series), chunk_size):
+        chunk = series.iloc[start:start + chunk_size].dropna()
+        if len(chunk) == 0:
+            continue
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        register_index = (hashes >> np.uint64(suffix_bits)).astype(np.intp)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        rank = (suffix_bits + 1 - _bit_length(suffix)).astype(np.int8)
+        np.maximum.at(registers, register_index, rank)
+    if not registers.any():
+        # the series has no non-missing values
+        return 0
+    alpha = 0.7213 / (1 + 1.079 / num_registers)
+    estimate = alpha * num_registers ** 2 / np.sum(np.power(2.0, -registers.astype(np.float64)))
+    empty_registers = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * num_registers and empty_registers > 0:
+        # linear counting is more accurate for small cardinalities
+        estimate = num_registers * np.log(num_registers / empty_registers)
+    return int(round(estimate))
+
+def approx_top(series, sample_size=const.DEFAULT_APPROX_SAMPLE_SIZE):
+    '''Estimate the most frequent non-missing value in a series, and its frequency.
+
+    The candidate value is the most frequent non-missing value in a fixed size
+    random sample of the rows, so only the sample is hashed. The frequency of the
+    candidate is then counted exactly with a single vectorised comparison over the
+    whole series. Returns (NaN, NaN) if the series has no non-missing values.
+    '''
+    if len(series) > sample_size:
+        # choosing the positions directly avoids a permutation of the whole series
+        positions = np.random.default_rng(0).choice(len(series), size=sample_size, replace=False)
+        sample = series.iloc[positions].dropna()
+        if len(sample) == 0:
+            # almost every value is missing, so look at all of the remaining values
+            sample = series.dropna()
+    else:
+        sample = series.dropna()
+    if len(sample) == 0:
+        return np.nan, np.nan
+    top = sample.value_counts().index[0]
+    freq = int((series == top).sum())
+    return top, freq
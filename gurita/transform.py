@@ -39,7 +39,8 @@ class Cut(CommandBase, name="cut"):
             if valid_columns:
                 if options.invert:
                     df = df.drop(options.columns, axis=1)
-                else:
+                elif valid_columns != list(df.columns):
+                    # selecting every column in its existing order leaves the data unchanged
                     df = df[valid_columns]
             else:
                 print(f"{PROGRAM_NAME} {self.name} WARNING: no valid columns were specified")
@@ -8,12 +8,15 @@ Portability : POSIX
 '''
 
 import sys
+import os
+import functools
 import logging
 from pathlib import Path
 import gurita.constants as const
 import re
 import codecs
 import numpy as np
+import pandas as pd
 
 # This magical incantation is intended to correctly parse escape characters in strings,
 # and tries to make sure that unicode characters are handled correctly.
@@ -22,6 +25,8 @@ def decode_escapes(str):
     return str.encode('utf8').decode('unicode_escape').encode("latin1").decode('utf8')
 
 # convert cm measurement to inches
+# the result is cached because every plot command computes it, usually with the same default sizes
+@functools.lru_cache(maxsize=128)
 def plot_dimensions_inches(width, height):
     width_inches = cm_to_inches(width)
     height_inches = cm_to_inches(height)
@@ -55,11 +60,11 @@ def validate_columns(df, columns):
     return valid_columns, invalid_columns
 
 def validate_columns_error(df, columns):
-    invalid_columns = []
-    for f in columns:
-        if f not in df:
-           invalid_columns.append(f)
-    if invalid_columns:
+    # a set difference avoids a lookup in the column index for every requested column;
+    # the missing columns are still reported in the order they were requested
+    missing = set(columns) - set(df.columns)
+    if missing:
+        invalid_columns = [f for f in dict.fromkeys(columns) if f in missing]
         bad_columns_str = ', '.join(invalid_columns)
         exit_with_error(f"The following requested columns are not in the data: {bad_columns_str}", const.EXIT_COMMAND_LINE_ERROR)
 
@@ -78,6 +83,70 @@ def exit_with_error(message, exit_status):
     sys.exit(exit_status)
 
 
+def shrink_for_plot(df, columns, grouping=()):
+    '''Make a compact copy of the columns of a data frame that are used by a plot.
+
+    Only the named columns are kept, so that seaborn does not carry unused columns
+    through its grouping and faceting. Text columns with relatively few distinct values
+    become categorical, with the categories in order of appearance, which is the
+    order seaborn uses for text columns. Text columns that the plot groups by are
+    always made categorical, so that seaborn groups by integer codes instead of
+    hashing strings. Integer columns are downcast to the
+    smallest type that holds their values. Floating point columns are not changed,
+    so that the plotted values are exactly the same.
+
+    Arguments:
+        df: the data frame to be plotted.
+        columns: names of the columns used by the plot, which may include None
+            for unused plot options, and names which are not in the data frame,
+            which are left for seaborn to report.
+        grouping: names of further columns used by the plot to group the data,
+            such as hue, row and col, in the same form as columns.
+    '''
+    grouping = [column for column in grouping if column is not None]
+    columns = [column for column in dict.fromkeys(list(columns) + grouping) if column is not None and column in df.columns]
+    shrunk = {}
+    for name in columns:
+        column = df[name]
+        if column.dtype == object:
+            categories = pd.unique(column.dropna())
+            if name in grouping or len(categories) < const.PLOT_CATEGORICAL_MAX_UNIQUE_FRACTION * len(column):
+                column = pd.Series(pd.Categorical(column, categories=categories), index=column.index, name=name)
+        elif column.dtype.kind in 'iu':
+            column = pd.to_numeric(column, downcast='unsigned' if column.dtype.kind == 'u' else 'integer')
+        shrunk[name] = column
+    return pd.DataFrame(shrunk, index=df.index)
+
+
+def write_stdout(output):
+    '''Write the complete output of a command to stdout in a single call.
+
+    Text is encoded once and written directly to the binary buffer underneath
+    sys.stdout, bypassing the line handling of the text layer. If the reader of
+    the output has gone away, for example in "gurita describe | head", the
+    program exits quietly instead of reporting a broken pipe.
+
+    Arguments:
+        output: the output as a string or bytes.
+    '''
+    if isinstance(output, str):
+        output = output.encode(sys.stdout.encoding)
+    try:
+        # flush anything already written in text mode so that output stays in order
+        sys.stdout.flush()
+        sys.stdout.buffer.write(output)
+        sys.stdout.buffer.flush()
+    except BrokenPipeError:
+        exit_broken_pipe()
+
+def exit_broken_pipe():
+    '''Exit quietly after the reader of stdout has gone away.'''
+    # redirect stdout to devnull so that the flush at interpreter exit does not fail again
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    sys.exit(const.EXIT_FILE_IO_ERROR)
+
+
 def get_sep_from_extension(filename):
     path = Path(filename)
     if path.suffix.upper() == '.TSV':
@@ -96,14 +165,18 @@ def output_field(options, field):
 
 
 def make_unique_numbered_filepath(path):
+    if not path.exists():
+        return path
     stem = path.stem
-    ext = path.suffix 
+    ext = path.suffix
+    # read the names in the directory once, instead of checking each numbered path in turn
+    existing = {entry.name for entry in os.scandir(path.parent)}
     counter = 1
-    while path.exists():
-        path = Path(stem + "_" + str(counter) + ext)
+    while f"{stem}_{counter}{ext}" in existing:
         counter += 1
-    return path
+    return path.with_name(f"{stem}_{counter}{ext}")
 
+@functools.lru_cache(maxsize=128)
 def make_estimator(str):
     estimators = const.ESTIMATOR_FUNS
     if str in estimators:
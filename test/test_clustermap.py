@@ -0,0 +1,11 @@
+import test.utils
+from pathlib import Path
+
+
+def test_clustermap_agg_tips_svg(capsys, tmpdir):
+    Path("test/outputs").mkdir(parents=True, exist_ok=True)
+    actual_out_file = Path("test/outputs", "test.clustermap.day.sex.tip.tips.svg")
+    command = f"in data/tips.csv + clustermap -x day -y sex -v tip --agg mean --format svg -o {str(actual_out_file)}"
+    expect_out_file = "test/expected/clustermap_day_sex_tip_tips.svg"
+    test.utils.command_output(capsys, command)
+    assert test.utils.same_svg(actual_out_file, expect_out_file)
@@ -9,3 +9,17 @@ def test_describe_titanic(capsys):
     with open("test/expected/describe_titanic.stdout") as expected_file:
        stdout = expected_file.read()
     test.utils.command_output(capsys, "in data/titanic.csv + describe", stdout=stdout)
+
+# The categorical columns of titanic.csv have few distinct values, so the
+# approximate summary is the same as the exact one
+def test_describe_approx_titanic(capsys):
+    with open("test/expected/describe_titanic.stdout") as expected_file:
+       stdout = expected_file.read()
+    test.utils.command_output(capsys, "in data/titanic.csv + describe --approx", stdout=stdout)
+
+# A frame without rows whose columns all have the same numerical type is
+# summarised with a zero count and missing statistics, like pandas
+def test_describe_empty_numeric_iris(capsys):
+    with open("test/expected/describe_empty_iris.stdout") as expected_file:
+       stdout = expected_file.read()
+    test.utils.command_output(capsys, "in data/iris.csv + filter sepal_length>100 + cut -c sepal_length petal_length + describe", stdout=stdout)
@@ -0,0 +1,21 @@
+import test.utils
+from pathlib import Path
+
+
+# There are no lunch time tips on Saturday or Sunday, so those cells are missing
+def test_heatmap_agg_missing_cells_tips_svg(capsys, tmpdir):
+    Path("test/outputs").mkdir(parents=True, exist_ok=True)
+    actual_out_file = Path("test/outputs", "test.heatmap.day.time.tip.tips.svg")
+    command = f"in data/tips.csv + heatmap -x day -y time -v tip --agg mean --format svg -o {str(actual_out_file)}"
+    expect_out_file = "test/expected/heatmap_day_time_tip_tips.svg"
+    test.utils.command_output(capsys, command)
+    assert test.utils.same_svg(actual_out_file, expect_out_file)
+
+def test_heatmap_duplicate_cells_tips(capsys):
+    stderr = "gurita ERROR: Error: Some pairs of day and time values occur more than once, use --agg to combine them; exiting\n"
+    test.utils.command_output(capsys, "in data/tips.csv + heatmap -x day -y time -v tip", stderr=stderr, exit=2)
+
+# Some passengers have no embark_town, and the error is the same when labels are missing
+def test_heatmap_duplicate_cells_missing_labels_titanic(capsys):
+    stderr = "gurita ERROR: Error: Some pairs of embark_town and class values occur more than once, use --agg to combine them; exiting\n"
+    test.utils.command_output(capsys, "in data/titanic.csv + heatmap -x embark_town -y class -v fare", stderr=stderr, exit=2)
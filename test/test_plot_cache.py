@@ -0,0 +1,16 @@
+import test.utils
+from pathlib import Path
+
+
+def test_hist_cache_sepal_length_iris_png(capsys, tmpdir, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmpdir))
+    Path("test/outputs").mkdir(parents=True, exist_ok=True)
+    # the first command renders the plot and caches it
+    rendered_out_file = Path("test/outputs", "test.hist_cache.sepal_length.iris.png")
+    command = f"in data/iris.csv + hist -x sepal_length --format png --cache -o {str(rendered_out_file)}"
+    test.utils.command_output(capsys, command)
+    assert len(list(Path(tmpdir, "gurita").glob("*.png"))) == 1
+    # the second command copies the plot from the cache
+    cached_out_file = Path("test/outputs", "test.hist_cached.sepal_length.iris.png")
+    command = f"in data/iris.csv + hist -x sepal_length --format png --cache -o {str(cached_out_file)}"
+    test.utils.command_output(capsys, command, out_file=cached_out_file, expect_out_file=rendered_out_file)
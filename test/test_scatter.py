@@ -0,0 +1,31 @@
+import test.utils
+from pathlib import Path
+from filecmp import cmp
+
+
+# The random sample of rows is fixed, so the same plot is drawn each time
+def test_scatter_maxpoints_reproducible_iris_svg(capsys, tmpdir):
+    Path("test/outputs").mkdir(parents=True, exist_ok=True)
+    out_files = [Path("test/outputs", f"test.scatter.maxpoints.{run}.iris.svg") for run in (1, 2)]
+    for out_file in out_files:
+        command = f"in data/iris.csv + scatter -x sepal_length -y petal_length --maxpoints 50 --format svg -o {str(out_file)}"
+        test.utils.command_output(capsys, command)
+    assert cmp(out_files[0], out_files[1], shallow=False)
+
+# The dots are stored as an image in vector formats only when the data is sampled
+def test_scatter_maxpoints_rasterized_iris_svg(capsys, tmpdir):
+    Path("test/outputs").mkdir(parents=True, exist_ok=True)
+    sampled_out_file = Path("test/outputs", "test.scatter.maxpoints.sampled.iris.svg")
+    command = f"in data/iris.csv + scatter -x sepal_length -y petal_length --maxpoints 50 --format svg -o {str(sampled_out_file)}"
+    test.utils.command_output(capsys, command)
+    assert "<image" in sampled_out_file.read_text()
+    # iris.csv has 150 rows, so nothing is sampled
+    all_out_file = Path("test/outputs", "test.scatter.maxpoints.all.iris.svg")
+    command = f"in data/iris.csv + scatter -x sepal_length -y petal_length --maxpoints 150 --format svg -o {str(all_out_file)}"
+    test.utils.command_output(capsys, command)
+    assert "<image" not in all_out_file.read_text()
+
+def test_scatter_maxpoints_zero_iris(capsys, tmpdir):
+    command = "in data/iris.csv + scatter -x sepal_length -y petal_length --maxpoints 0"
+    stderr = "gurita ERROR: The maximum number of points must be at least 1: 0; exiting\n"
+    test.utils.command_output(capsys, command, stderr=stderr, exit=2)
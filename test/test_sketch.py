@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from gurita.sketch import approx_nunique, approx_top
+import pytest
+
+def test_approx_nunique_empty():
+    result = approx_nunique(pd.Series([], dtype=float))
+    assert result == 0
+
+def test_approx_nunique_small():
+    result = approx_nunique(pd.Series(["a", "b", "a", None, "c"]))
+    assert result == 3
+
+def test_approx_nunique_large():
+    result = approx_nunique(pd.Series(np.arange(200000) % 50000))
+    assert result == pytest.approx(50000, rel=0.03)
+
+def test_approx_nunique_chunks():
+    series = pd.Series(np.where(np.arange(200000) % 7 == 0, np.nan, np.arange(200000) % 50000))
+    result = approx_nunique(series, chunk_size=1000)
+    assert result == approx_nunique(series)
+    assert result == pytest.approx(series.nunique(), rel=0.03)
+
+def test_approx_top():
+    top, freq = approx_top(pd.Series(["x"] * 30 + ["y"] * 20 + [None] * 40))
+    assert (top, freq) == ("x", 30)
+
+def test_approx_top_sampled():
+    series = pd.Series(["x"] * 30000 + ["y"] * 10000 + [None] * 20000)
+    top, freq = approx_top(series, sample_size=1000)
+    assert (top, freq) == ("x", 30000)
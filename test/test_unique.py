@@ -0,0 +1,12 @@
+import test.utils
+
+def test_unique_sort_iris(capsys, tmpdir):
+    with open("test/expected/unique_species_iris.stdout") as expected_file:
+       stdout = expected_file.read()
+    test.utils.command_output(capsys, "in data/iris.csv + unique -c species --sort", stdout=stdout)
+
+# Missing values are written as empty lines, after the sorted values
+def test_unique_sort_missing_titanic(capsys, tmpdir):
+    with open("test/expected/unique_deck_titanic.stdout") as expected_file:
+       stdout = expected_file.read()
+    test.utils.command_output(capsys, "in data/titanic.csv + unique -c deck --sort", stdout=stdout)
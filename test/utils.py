@@ -1,4 +1,5 @@
 import pytest
+import re
 from filecmp import cmp
 
 import matplotlib as mpl
@@ -28,3 +29,14 @@ def command_output(capsys, cmd, out_file=None, expect_out_file=None, stdout="",
     if out_file is not None and expect_out_file is not None:
         assert cmp(out_file, expect_out_file, shallow=False)
 
+
+# Matplotlib names the clipping paths of an SVG file with a hash of their coordinates,
+# whose last digits can vary between library versions, so the names are removed before comparing
+def without_clip_path_ids(svg_file):
+    with open(svg_file) as file:
+        return re.sub(r'(id="|url\(#)p[0-9a-f]{10}', r'\1p', file.read())
+
+# Compare two SVG files, ignoring the names of their clipping paths
+def same_svg(out_file, expect_out_file):
+    return without_clip_path_ids(out_file) == without_clip_path_ids(expect_out_file)
+